@@ -1,5 +1,6 @@
 import cv2
 import numpy as np
+from scipy import ndimage as ndi
 from plantcv.plantcv.logical_and import logical_and
 from plantcv.plantcv import fatal_error, warn
 from plantcv.plantcv import params
@@ -139,8 +140,13 @@ def _iterate_analysis(img, labeled_mask, n_labels, label, function, **kwargs):
     mask_copy = np.copy(labeled_mask)
     if len(np.unique(mask_copy)) == 2 and np.max(mask_copy) == 255:
         mask_copy = np.where(mask_copy == 255, 1, 0).astype(np.uint8)
+    # Find the bounding box of each object so its submask only needs to be filled within it
+    obj_slices = ndi.find_objects(mask_copy, max_label=n_labels)
     for i in range(1, n_labels + 1):
-        submask = np.where(mask_copy == i, 255, 0).astype(np.uint8)
+        submask = np.zeros(mask_copy.shape, dtype=np.uint8)
+        obj_slice = obj_slices[i - 1]
+        if obj_slice is not None:
+            submask[obj_slice][mask_copy[obj_slice] == i] = 255
         img = function(img=img, mask=submask, label=f"{labels[i - 1]}_{i}", **kwargs)
     return img
 
@@ -1,10 +1,13 @@
 """Analyzes the X and Y spatial distribution of objects in an image."""
 import os
 import numpy as np
-from plantcv.plantcv import auto_crop, outputs, params
+from plantcv.plantcv import outputs, params
 from plantcv.plantcv._debug import _debug
 from plantcv.plantcv._helpers import _iterate_analysis
 
+# Number of set bits for every possible byte value
+_POPCOUNT_LUT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, np.newaxis], axis=1).sum(axis=1).astype(np.uint8)
+
 
 def distribution(labeled_mask, n_labels=1, direction="down", bin_size=100, hist_range="absolute", label=None):
     """Analyze the distribution of objects along an axis of an image.
@@ -32,7 +35,7 @@ def distribution(labeled_mask, n_labels=1, direction="down", bin_size=100, hist_
     # Increment the device counter
     params.device += 1
 
-    # Set lable to params.sample_label if None
+    # Set label to params.sample_label if None, once for all objects
     if label is None:
         label = params.sample_label
 
@@ -43,7 +46,9 @@ def distribution(labeled_mask, n_labels=1, direction="down", bin_size=100, hist_
         labeled_mask = np.swapaxes(labeled_mask, 0, 1)
 
     # Create combined mask as "img" for iterative analysis input
-    img = np.where(labeled_mask > 0, 255, 0).astype(np.uint8)
+    # (view the boolean mask as uint8 and scale it in place to avoid int64 temporaries)
+    img = (labeled_mask > 0).view(np.uint8)
+    img *= 255
 
     # Iterate over each labeled object and analyze the distribution
     _ = _iterate_analysis(img=img, labeled_mask=labeled_mask, n_labels=n_labels, label=label,
@@ -61,12 +66,13 @@ def distribution(labeled_mask, n_labels=1, direction="down", bin_size=100, hist_
     return dist_chart
 
 
-def _analyze_distribution(img, mask, direction="y", bin_size=100, hist_range="absolute", label=None):
+def _analyze_distribution(img, mask, label, direction="y", bin_size=100, hist_range="absolute"):
     """Analyze the color properties of an image object
     Inputs:
     mask             = Binary mask made from selected contours
     bin_size         = Size in pixels of the histogram bins
-    label            = optional label parameter, modifies the variable name of observations recorded
+    label            = label parameter, modifies the variable name of observations recorded (already resolved from
+                       params.sample_label by distribution)
 
     Returns:
     distribution_image   = histogram output
@@ -77,67 +83,70 @@ def _analyze_distribution(img, mask, direction="y", bin_size=100, hist_range="ab
     :param label: str
     :return distribution_images: list
     """
-    # Image not needed
-    img -= 0
+    # Image not needed, it is only accepted to match the _iterate_analysis function signature
+    del img
 
-    # Store debug
-    debug = params.debug
-    params.debug = None
+    # Count white pixels in each row of the mask once, the row counts are used for every measurement below
+    row_counts = _row_popcount(mask=mask)
+    total = row_counts.sum()
 
-    # Autocrop the mask if hist_range is "relative" to set the scale to the object size
-    if hist_range == "relative" and np.count_nonzero(mask) != 0:
-        mask = auto_crop(img=mask, mask=mask, padding_x=0, padding_y=0, color="black")
+    # Crop to the object rows if hist_range is "relative" to set the scale to the object size
+    if hist_range == "relative" and total != 0:
+        rows = np.flatnonzero(row_counts)
+        row_counts = row_counts[rows[0]:rows[-1] + 1]
 
     # Initialize output data
     # find the height, in pixels, for this image
-    height = mask.shape[0]
+    height = len(row_counts)
     num_bins = height // bin_size
 
     # Initialize output measurements
     hist = np.zeros(num_bins)  # Histogram of the distribution
-    counts = []  # Weighted list of bin values to calculate the median bin
     mean_bin = 0  # Mean bin value
     median_bin = 0  # Median bin value
     dist_std = 0  # Standard deviation of the distribution
     bin_labels = np.arange(num_bins) * bin_size  # Labels for the bins (pixel position)
 
-    # Skip empty masks
-    if np.count_nonzero(mask) != 0:
-        # Calculate histogram
-        for i in range(0, height, bin_size):
-            # Extract a slice from the mask the width of bin_size at each step
-            mask_slice = mask[i:min(i+bin_size, height), :]
-            count = np.count_nonzero(mask_slice)  # Count white pixels
-            bin_index = min(i // bin_size, num_bins - 1)  # Ensure index within range
-            hist[bin_index] += count  # Add count to the bin
-            counts += [bin_index * bin_size] * count
-
-        # Calculate the median value distribution
-        median_bin = np.median(counts)
-
-        # Calculate the mean and standard deviation X and Y  value distribution
-        mean_bin = np.mean(counts)
-        dist_std = np.std(counts)
-
-    # Save histograms
-    outputs.add_observation(sample=label, variable=f'{direction}_frequencies', trait=f'{direction} frequencies',
-                            method='plantcv.plantcv.analyze.distribution', scale='frequency', datatype=list,
-                            value=hist.tolist(), label=bin_labels.tolist())
-
-    # Save average measurements
-    outputs.add_observation(sample=label, variable=f'{direction}_distribution_mean',
-                            trait=f'{direction} distribution mean',
-                            method='plantcv.plantcv.analyze.distribution', scale='pixels', datatype=float,
-                            value=mean_bin, label='pixel')
-    outputs.add_observation(sample=label, variable=f'{direction}_distribution_median',
-                            trait=f'{direction} distribution median',
-                            method='plantcv.plantcv.analyze.distribution', scale='pixel', datatype=float,
-                            value=median_bin, label='pixel')
-    outputs.add_observation(sample=label, variable=f'{direction}_distribution_std',
-                            trait=f'{direction} distribution standard deviation',
-                            method='plantcv.plantcv.analyze.distribution', scale='pixel', datatype=float,
-                            value=dist_std, label='pixel')
-    # Restore debug
-    params.debug = debug
+    # Skip empty masks and objects smaller than a single bin
+    if total != 0 and num_bins > 0:
+        # Sum the row counts into bins, the last bin also collects any remaining partial bin
+        hist = np.add.reduceat(row_counts, bin_labels).astype(float)
+
+        # Calculate the median value distribution from the middle pixel(s) of the cumulative histogram
+        middle = np.searchsorted(np.cumsum(hist), [(total - 1) // 2, total // 2], side="right")
+        median_bin = np.mean(bin_labels[middle])
+
+        # Calculate the mean and standard deviation X and Y  value distribution, weighting each bin by its pixel count
+        mean_bin = np.dot(hist, bin_labels) / total
+        dist_std = np.sqrt(np.dot(hist, (bin_labels - mean_bin) ** 2) / total)
+
+    # Save histograms and average measurements
+    method = 'plantcv.plantcv.analyze.distribution'
+    outputs.add_observations(sample=label, records=[
+        dict(variable=f'{direction}_frequencies', trait=f'{direction} frequencies', method=method,
+             scale='frequency', datatype=list, value=hist.tolist(), label=bin_labels.tolist()),
+        dict(variable=f'{direction}_distribution_mean', trait=f'{direction} distribution mean', method=method,
+             scale='pixels', datatype=float, value=mean_bin, label='pixel'),
+        dict(variable=f'{direction}_distribution_median', trait=f'{direction} distribution median', method=method,
+             scale='pixel', datatype=float, value=median_bin, label='pixel'),
+        dict(variable=f'{direction}_distribution_std', trait=f'{direction} distribution standard deviation',
+             method=method, scale='pixel', datatype=float, value=dist_std, label='pixel'),
+    ])
 
     return mask
+
+
+def _row_popcount(mask):
+    """Count the nonzero pixels in each row of a mask.
+    Inputs:
+    mask       = Binary mask
+
+    Returns:
+    row_counts = Number of nonzero pixels in each row
+
+    :param mask: numpy.ndarray
+    :return row_counts: numpy.ndarray
+    """
+    # Pack each row of the mask into bits (8 pixels per byte) and count the set bits per row
+    bits = np.packbits(mask, axis=1)
+    return _POPCOUNT_LUT[bits].sum(axis=1, dtype=np.int64)
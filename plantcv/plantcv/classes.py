@@ -127,6 +127,33 @@ class Outputs:
             "label": label
         }
 
+    # Method to add multiple observations for a sample to outputs
+    def add_observations(self, sample, records):
+        """Keyword arguments/parameters:
+        sample       = Sample name. Used to distinguish between multiple samples
+        records      = List of observations, each a dictionary with the keys variable, trait, method, scale,
+                       datatype, value, and label (see add_observation)
+
+        :param sample: str
+        :param records: list
+        """
+        # Validate all the records before saving any of them
+        observations = {}
+        for record in records:
+            # Validate that the data type is supported by JSON
+            _ = _validate_data_type(record["value"])
+            observations[record["variable"]] = {
+                "trait": record["trait"],
+                "method": record["method"],
+                "scale": record["scale"],
+                "datatype": str(record["datatype"]),
+                "value": record["value"],
+                "label": record["label"]
+            }
+
+        # Save the observations for the sample in a single update
+        self.observations.setdefault(sample, {}).update(observations)
+
     # Method to add metadata instance to outputs
     def add_metadata(self, term, datatype, value):
         """Add a metadata term and value to outputs.
@@ -1,76 +1,28 @@
 import numpy as np
-import matplotlib.pyplot as plt
-from scipy.cluster.hierarchy import dendrogram, linkage
+from scipy.cluster.hierarchy import linkage
 from scipy.cluster.hierarchy import cut_tree
 from plantcv.plantcv import params
 
 
-def _get_empty_count(cur_index_id):
-    """Helper function for getting empty count"""
-    empty_count = 0
-    for i in cur_index_id:
-        if i is None:
-            empty_count += 1
-    return empty_count
-
-
-def _get_empty_indicies(cur_index, cur_plms_copy):
-    """Helper function for getting empty indicies"""
-    empty_index = []
-    for i, v in zip(cur_index, cur_plms_copy.iloc[cur_index, 0].values):
-        if v is None:
-            empty_index.append(i)
-    return empty_index
-
-
-def _get_unique_ids(cur_index_id):
-    """Helper function for getting id's"""
-    unique_ids = []
-    for id_ in cur_index_id:
-        if id_ is not None and id_ not in unique_ids:
-            unique_ids.append(id_)
-    return unique_ids
-
-
-def _get_rogues(cur_plms_copy):
-    """Helper function for getting rogues"""
-    rogues = []
-    for i, x in enumerate(cur_plms_copy['group'].values):
-        if x is None:
-            rogues.append(i)
-    return rogues
-
-
-def _generate_labelnames(plmnames, grpnames):
-    """Helper function for generating label names"""
-    labelnames = []
-    for li in range(0, len(plmnames)):
-        labelname = f'{plmnames[li]} ({grpnames[li]})'
-        labelnames.append(labelname)
-    return labelnames
-
-
-def _pair_unnassigned(unique_ids, cur_index, cur_index_id, cur_plms_copy, empty_count, sanity_check_pos):
+def _pair_unnassigned(unique_ids, cur_index, cur_index_id, group, day_key, empty_count):
     """Helper function for pairing unassigned"""
     for uid in unique_ids:
         # If only one plm assigned a name in current cluster and a second unnamed plm exists
         # transfer ID over to create a pair
-        if np.count_nonzero(np.array(cur_index_id) == uid) < 2 and empty_count == 1:
-            # Store boolean positions for plms with IDs matching current id out of current cluster
-            match_ids = [i for i, x in enumerate(cur_plms_copy.iloc[cur_index, 0].values == uid) if x]
-            # Store boolean positions for plms which are unnamed out of current cluster
-            null_ids = []
-            for i, x in enumerate(cur_plms_copy.iloc[cur_index, 0].values):
-                if x is None:
-                    null_ids.append(i)
+        if np.count_nonzero(cur_index_id == uid) < 2 and empty_count == 1:
+            # Store positions for plms with IDs matching current id out of current cluster
+            match_ids = np.flatnonzero(cur_index_id == uid)
+            # Store positions for plms which are unnamed out of current cluster
+            null_ids = np.flatnonzero(cur_index_id == -1)
             # If exactly 1 matching ID and 1 null ID (i.e. 2 plms total)
             # continue to pass ID name to the unnamed plm
             if len(match_ids) + len(null_ids) == 2:
                 # Sanity check! Pairs must be on different days
-                pair_names = cur_plms_copy.iloc[[cur_index[i] for i in match_ids + null_ids], 1].values
-                if pair_names[0].split('_')[sanity_check_pos] != pair_names[1].split('_')[sanity_check_pos]:
-                    # Transfer identities to the unnamed plm
-                    cur_plms_copy.iloc[[cur_index[i] for i in null_ids], 0] = uid
+                pair_days = day_key[cur_index[np.concatenate((match_ids, null_ids))]]
+                if pair_days[0] != pair_days[1]:
+                    # Transfer identities to the unnamed plm (and keep the current cluster's IDs in sync)
+                    group[cur_index[null_ids]] = uid
+                    cur_index_id[null_ids] = uid
 
 
 def constella(cur_plms, pc_starscape, group_iter, outfile_prefix):
@@ -89,11 +41,15 @@ def constella(cur_plms, pc_starscape, group_iter, outfile_prefix):
     :param group_iter: int
     :param outfile_prefix: str
     """
-    # Copy dataframe to avoid modifying the input dataframe
-    cur_plms_copy = cur_plms.copy(deep=True)
-
     sanity_check_pos = 2  # Needs to point at days in image identifier!
 
+    # Copy group assignments into an array to avoid modifying the input dataframe, unnamed plms are set to -1
+    group = np.where(cur_plms['group'].isna(), -1, cur_plms['group']).astype(np.int64)
+    plmname = cur_plms['plmname'].to_numpy()
+    # Day of each plm as an integer code, used for the sanity check that pairs are on different days
+    days = np.fromiter((name.split('_')[sanity_check_pos] for name in plmname), dtype=object, count=len(plmname))
+    _, day_key = np.unique(days, return_inverse=True)
+
     singleton_no = pc_starscape.shape[0]
 
     if params.debug is not None:
@@ -101,53 +57,61 @@ def constella(cur_plms, pc_starscape, group_iter, outfile_prefix):
 
     plm_links = linkage(pc_starscape.loc[:, pc_starscape.columns[2:len(pc_starscape.columns)]].values, 'ward')
 
-    # For n-1 to 2 leaves on the current hierarchical cluster dendrogram...
-    for c in np.arange(singleton_no - 1, 2, -1):
-        # Extract current number of clusters for the agglomeration step
-        cutree = cut_tree(plm_links, n_clusters=c)
-        # Generate a list of all current clusters identified
-        group_list = np.unique(cutree)
+    # Extract the cluster assignments for n-1 to 3 leaves on the current hierarchical cluster dendrogram
+    # in a single pass over the linkage matrix (one column per agglomeration step)
+    all_cuts = cut_tree(plm_links, n_clusters=np.arange(singleton_no - 1, 2, -1))
+
+    # For n-1 to 3 leaves on the current hierarchical cluster dendrogram...
+    for cutree in all_cuts.T:
+        # Sort row indices by cluster so the members of each cluster are contiguous
+        order = np.argsort(cutree, kind="stable")
+        # Generate a list of all current clusters identified and where each one starts in the sorted indices
+        _, group_starts = np.unique(cutree[order], return_index=True)
 
         # For the current cluster being queried...
-        for g in group_list:
-            # Create list of current clusters row indices in pandas dataframe
-            cur_index = [i for i, x in enumerate(cutree == g) if x]
+        for cur_index in np.split(order, group_starts[1:]):
             # Create list of current clusters present group identity assignments
-            cur_index_id = np.array(cur_plms_copy.iloc[cur_index, 0])
+            cur_index_id = group[cur_index]
             # Are any of the plms in the current cluster unnamed, how many?
-            empty_count = _get_empty_count(cur_index_id)
-            empty_index = _get_empty_indicies(cur_index, cur_plms_copy)
+            empty_count = np.count_nonzero(cur_index_id == -1)
+            empty_index = cur_index[cur_index_id == -1]
             # Are any of the plms in the current cluster already assigned an identity, what are those identities?
-            unique_ids = _get_unique_ids(cur_index_id)
+            # (kept in order of first appearance in the cluster)
+            named_ids = cur_index_id[cur_index_id != -1]
+            _, first_index = np.unique(named_ids, return_index=True)
+            unique_ids = named_ids[np.sort(first_index)]
             # If cluster is two unnamed plms exactly, assign this group their own identity as a pair
             if empty_count == 2:
-                pair_names = cur_plms_copy.iloc[empty_index, 1].values
                 # Sanity check! Pairs must be on different days
-                if pair_names[0].split('_')[sanity_check_pos] != pair_names[1].split('_')[sanity_check_pos]:
-                    cur_plms_copy.iloc[empty_index, 0] = group_iter
+                if day_key[empty_index[0]] != day_key[empty_index[1]]:
+                    group[empty_index] = group_iter
                     group_iter = group_iter + 1
                 else:
-                    cur_plms_copy.iloc[empty_index[0], 0] = group_iter
-                    cur_plms_copy.iloc[empty_index[1], 0] = group_iter + 1
+                    group[empty_index[0]] = group_iter
+                    group[empty_index[1]] = group_iter + 1
                     group_iter = group_iter + 2
             # If cluster is one unnamed plm and one plm with an identity, assign the unnamed plm the identity of the
-            _pair_unnassigned(unique_ids, cur_index, cur_index_id, cur_plms_copy, empty_count, sanity_check_pos)
-    rogues = _get_rogues(cur_plms_copy)
-    for rogue in rogues:
-        cur_plms_copy.iloc[[rogue], 0] = group_iter
-        group_iter = group_iter + 1
-
-    grpnames = cur_plms_copy.loc[:, ['group']].values
-    plmnames = cur_plms_copy.loc[:, ['plmname']].values
+            _pair_unnassigned(unique_ids, cur_index, cur_index_id, group, day_key, empty_count)
+    # Give each remaining unnamed plm its own identity
+    rogues = np.flatnonzero(group == -1)
+    group[rogues] = np.arange(group_iter, group_iter + len(rogues))
+    group_iter = group_iter + len(rogues)
 
-    labelnames = _generate_labelnames(plmnames, grpnames)
+    # Rebuild the dataframe with the new group assignments
+    cur_plms_copy = cur_plms.assign(group=np.where(group == -1, None, group))
 
     if params.debug is not None:
+        # Plotting libraries are only needed for debugging
+        import matplotlib.pyplot as plt
+        from scipy.cluster.hierarchy import dendrogram
+
+        # Label each plm with its name and group identity
+        labelnames = np.char.add(plmname.astype(str), np.char.add(' (', np.char.add(group.astype(str), ')')))
         plt.figure()
         plt.title('')
         plt.xlabel('')
         plt.ylabel('')
-        dendrogram(plm_links, color_threshold=100, orientation="left", leaf_font_size=10, labels=np.array(labelnames))
+        dendrogram(plm_links, color_threshold=100, orientation="left", leaf_font_size=10, labels=labelnames)
         plt.tight_layout()
 
         if params.debug == "print":
@@ -1,7 +1,9 @@
 # Tests for pcv.analyze.distribution
 import cv2
+import numpy as np
 from plantcv.plantcv import outputs
 from plantcv.plantcv.analyze import distribution as analyze_distribution
+from plantcv.plantcv.analyze.distribution import _row_popcount
 
 
 def test_distribution(test_data):
@@ -14,3 +16,35 @@ def test_distribution(test_data):
     _ = analyze_distribution(labeled_mask=mask, n_labels=1, direction="across", hist_range="relative")
     print(outputs.observations)
     assert int(outputs.observations['default_1']['x_distribution_mean']['value']) == 130
+
+
+def test_row_popcount():
+    """Test for PlantCV."""
+    # Create a 3 x 10 mask with 0, 1 and 10 pixels set in each row
+    mask = np.zeros((3, 10), dtype=np.uint8)
+    mask[1, 9] = 255
+    mask[2, :] = 255
+    assert _row_popcount(mask=mask).tolist() == [0, 1, 10]
+
+
+def test_distribution_partial_bin(test_data):
+    """Test for PlantCV."""
+    # Clear previous outputs
+    outputs.clear()
+    # Read in test data
+    mask = cv2.imread(test_data.small_bin_fill, -1)
+    # Use a bin size that does not evenly divide the image width
+    _ = analyze_distribution(labeled_mask=mask, n_labels=1, direction="across", bin_size=30)
+    hist = outputs.observations['default_1']['x_frequencies']['value']
+    assert len(hist) == mask.shape[1] // 30 and sum(hist) == np.count_nonzero(mask)
+
+
+def test_distribution_small_object():
+    """Test for PlantCV."""
+    # Clear previous outputs
+    outputs.clear()
+    # Create an object shorter than a single bin
+    mask = np.zeros((100, 100), dtype=np.uint8)
+    mask[40:45, 40:60] = 255
+    _ = analyze_distribution(labeled_mask=mask, n_labels=1, bin_size=10, hist_range="relative")
+    assert outputs.observations['default_1']['y_distribution_mean']['value'] == 0
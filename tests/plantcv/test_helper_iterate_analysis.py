@@ -1,4 +1,5 @@
 import cv2
+import numpy as np
 import pytest
 from plantcv.plantcv._helpers import _iterate_analysis
 
@@ -20,3 +21,15 @@ def test_iterate_analysis_wrong_num_labels(test_data):
 def analysis_test_func(**kwargs):
     """Test analysis function."""
     return kwargs["img"]
+
+
+def test_iterate_analysis_submasks():
+    """Test for PlantCV."""
+    # Create a labeled mask with two objects and one missing label
+    labeled_mask = np.zeros((20, 20), dtype=np.int32)
+    labeled_mask[2:5, 3:8] = 1
+    labeled_mask[10:18, 12:14] = 2
+    submasks = []
+    _ = _iterate_analysis(img=labeled_mask, labeled_mask=labeled_mask, n_labels=3, label="test",
+                          function=lambda img, mask, label: submasks.append(mask))
+    assert [np.count_nonzero(m) for m in submasks] == [15, 16, 0] and submasks[1][10:18, 12:14].min() == 255
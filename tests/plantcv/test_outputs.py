@@ -26,6 +26,28 @@ def test_add_observation_invalid_type():
                                 datatype=list, value=np.array([2]), label=[])
 
 
+def test_add_observations():
+    """Test for PlantCV."""
+    # Create output instance
+    outputs = Outputs()
+    outputs.add_observations(sample='default', records=[
+        dict(variable='test1', trait='test variable', method='type', scale='none', datatype=int, value=1, label='none'),
+        dict(variable='test2', trait='test variable', method='type', scale='none', datatype=list, value=[2], label=[])
+    ])
+    assert outputs.observations["default"]["test1"]["value"] == 1 and outputs.observations["default"]["test2"]["value"] == [2]
+
+
+def test_add_observations_invalid_type():
+    """Test for PlantCV."""
+    # Create output instance
+    outputs = Outputs()
+    with pytest.raises(RuntimeError):
+        outputs.add_observations(sample='default', records=[
+            dict(variable='test', trait='test variable', method='type', scale='none', datatype=list,
+                 value=np.array([2]), label=[])
+        ])
+
+
 def test_save_results_json_newfile(tmpdir):
     """Test for PlantCV."""
     # Create a test tmp directory